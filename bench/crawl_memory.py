@@ -0,0 +1,101 @@
+"""
+Peak memory of a full machine crawl, gathered vs streamed.
+
+Serves a synthetic listing (~45 KB pages, 20 VMs each) through an in-process
+httpx.MockTransport and crawls it twice, each run in its own process:
+
+  gather  fetch every page (3 in flight), decode it, then filter the full list
+  stream  MachineScraper.iter_machines, filtering records as they arrive
+
+The filter keeps about 10% of the machines. Peak RSS comes from
+resource.getrusage, so this runs on Linux and macOS only.
+
+Usage: python bench/crawl_memory.py [pages ...]    (default: 200 800 3200)
+"""
+import os
+import sys
+import time
+import asyncio
+import resource
+import subprocess
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hmv.modules.scraper import MachineScraper
+
+ROWS_PER_PAGE = 20
+
+def row(i: int) -> str:
+    return f'''<tr><td><h4 class="vmname"><a href="#">vm{i:05d}</a></h4>
+<div style="border-top: 3px solid #28a745;"></div><img src="/img/linux.png" title="Linux">
+<a class="creator">creator{i % 7}</a><p class="size">{(i % 50) / 10 + 0.5} GB</p><span class="badge">TO HACK</span>
+<p>{"lorem ipsum " * 40}</p></td></tr>'''
+
+def page(p: int, n_pages: int) -> str:
+    rows = "".join(row((p - 1) * ROWS_PER_PAGE + k) for k in range(ROWS_PER_PAGE))
+    return f'''<html><body><table class="table-dark"><tbody>{rows}</tbody></table>
+<ul><li class="page-item disabled"><a class="page-link">{p}/{n_pages}</a></li></ul>{"<div>pad</div>" * 2000}</body></html>'''
+
+def fake_client(n_pages: int) -> httpx.AsyncClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text=page(int(request.url.params.get("p", 1)), n_pages))
+    return httpx.AsyncClient(base_url="https://hackmyvm.eu", transport=httpx.MockTransport(handler))
+
+def keep(m) -> bool:
+    return m["difficulty"] == "beginner" and m["name"].endswith("7")
+
+async def gather_crawl(n_pages: int) -> list:
+    """The pre-streaming crawl: every page held in memory before filtering."""
+    scraper = MachineScraper(fake_client(n_pages))
+    sem = asyncio.Semaphore(3)
+
+    async def fetch(p):
+        async with sem:
+            response = await scraper.client.get("/machines/", params={"p": p, "l": "all"})
+            return scraper.parse_machines(response.text, p)[0]
+
+    pages = await asyncio.gather(*[fetch(p) for p in range(1, n_pages + 1)])
+    seen, machines = set(), []
+    for m in (m for ms in pages for m in ms):
+        key = m["name"].strip().lower()
+        if key not in seen:
+            seen.add(key)
+            machines.append(m)
+    return [m for m in machines if keep(m)]
+
+async def stream_crawl(n_pages: int) -> list:
+    scraper = MachineScraper(fake_client(n_pages))
+    return [m async for m in scraper.iter_machines(level="all") if keep(m)]
+
+def peak_rss_mib() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def measure(mode: str, n_pages: int):
+    crawl = gather_crawl if mode == "gather" else stream_crawl
+    base = peak_rss_mib()
+    start = time.perf_counter()
+    hits = asyncio.run(crawl(n_pages))
+    print(f"{peak_rss_mib() - base:.1f} {time.perf_counter() - start:.2f} {len(hits)}")
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--run":
+        measure(sys.argv[2], int(sys.argv[3]))
+        return
+
+    sizes = [int(a) for a in sys.argv[1:]] or [200, 800, 3200]
+    print(f"{'pages':>6}  {'mode':<6}  {'peak RSS growth':>15}  {'time':>7}  {'hits':>5}")
+    for n_pages in sizes:
+        for mode in ("gather", "stream"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--run", mode, str(n_pages)],
+                capture_output=True, text=True, check=True
+            ).stdout.split()
+            growth, elapsed, hits = out
+            print(f"{n_pages:>6}  {mode:<6}  {'+' + growth + ' MiB':>15}  {elapsed + 's':>7}  {hits:>5}")
+
+if __name__ == "__main__":
+    main()
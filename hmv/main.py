@@ -1,6 +1,7 @@
 import typer
 import asyncio
 import inspect
+from typing import List
 from rich.console import Console
 
 from hmv.modules import (
@@ -9,6 +10,10 @@ from hmv.modules import (
     DownloadManager, 
     FlagManager, 
     WriteupManager,
+    WatchManager,
+    MachineLookup,
+    MachineDetails,
+    DownloadCache,
     __version__,     
     __author__,      
     __github_url__   
@@ -33,11 +38,10 @@ def main_banner(ctx: typer.Context):
     This callback runs before any subcommand executes.
     We handle the banner printing here.
     """
-    if ctx.invoked_subcommand != "config":
+    # Subcommands print the banner themselves, on the console they write to.
+    if ctx.invoked_subcommand is None:
         banner_text = get_banner(__version__, __author__, __github_url__)
         console.print(banner_text)
-
-    if ctx.invoked_subcommand is None:
         console.print(ctx.get_help())
 
 @app.command()
@@ -53,7 +57,19 @@ def config():
     except Exception as e:
         console.print(f"[bold red][!][/bold red] Failed to save configuration: {e}")
 
+def machine_help(ctx: typer.Context, value: bool):
+    """
+    Eager --help for the machine command. Its banner is printed by the command
+    body (on stderr in watch mode), which --help never reaches.
+    """
+    if not value or ctx.resilient_parsing:
+        return
+    console.print(get_banner(__version__, __author__, __github_url__))
+    console.print(ctx.get_help())
+    raise typer.Exit()
+
 @app.command(
+    add_help_option=False,
     epilog=inspect.cleandoc("""
         [bold yellow]Usage Examples:[/bold yellow]
 
@@ -63,17 +79,23 @@ def config():
 
         3. [bold white]Display ALL machines[/bold white] in one single table:   [cyan]hmv machine -a[/cyan]
 
-        4. [bold white]Search for a machine by name[/bold white]:               [cyan]hmv machine -n <name>[/cyan]
+        4. [bold white]Search for a machine by name[/bold white]:               [cyan]hmv machine -n <name>[/cyan] | [cyan]hmv machine -n <name> --fuzzy[/cyan]
 
         5. [bold white]Filter by difficulty or OS[/bold white]:                 [cyan]hmv machine -s <beginner|intermediate|advanced>[/cyan] | [cyan]hmv machine -s <linux|windows> -a[/cyan]
 
         6. [bold white]Sort all machines by size[/bold white]:                  [cyan]hmv machine -s size -a[/cyan]
 
-        7. [bold white]Download a machine[/bold white]:                         [cyan]hmv machine -d <name>[/cyan]
+        7. [bold white]Download a machine[/bold white]:                         [cyan]hmv machine -d <name>[/cyan] | [cyan]hmv machine -d <name> --dry-run[/cyan]
 
         8. [bold white]Get community writeups[/bold white]:                     [cyan]hmv machine -v <name> -w[/cyan]
 
         9. [bold white]Submit a flag[/bold white]:                              [cyan]hmv machine -v <name> -f <flag>[/cyan]
+
+        10. [bold white]Watch for new machines[/bold white]:                    [cyan]hmv machine --watch [--interval <seconds>] [--hook <command>][/cyan]
+
+        11. [bold white]Show release date, rating and counts[/bold white]:      [cyan]hmv machine -l --with-details[/cyan] | [cyan]hmv machine -s released -a[/cyan]
+
+        12. [bold white]Plan several downloads[/bold white]:                    [cyan]hmv machine --plan-download <name1,name2,...>[/cyan]
     """)
 )
 def machine(
@@ -88,11 +110,19 @@ def machine(
     ),
     sort: str = typer.Option(
         None, "--sort", "-s", 
-        help="Filter: beginner, intermediate, advanced, windows, linux, size, hacked, all."
+        help="Filter: beginner, intermediate, advanced, windows, linux, size, released, rating, hacked, all."
     ),
     search: str = typer.Option(
         None, "--name", "-n",
-        help="Search for a specific machine by name."
+        help="Search for a specific machine by name (stops at the first exact match)."
+    ),
+    fuzzy: bool = typer.Option(
+        False, "--fuzzy",
+        help="Rank typo-tolerant name suggestions from the local index (use with -n)."
+    ),
+    with_details: bool = typer.Option(
+        False, "--with-details",
+        help="Add release date, rating, flag and writeup counts from each machine page (cached)."
     ),
     page: int = typer.Option(
         1, "--page", "-p", 
@@ -102,6 +132,14 @@ def machine(
         None, "--download", "-d", 
         help="Download a machine by its name."
     ),
+    plan_download: List[str] = typer.Option(
+        None, "--plan-download",
+        help="Resolve links and sizes for several VMs (repeat or comma-separate) without downloading."
+    ),
+    dry_run: bool = typer.Option(
+        False, "--dry-run",
+        help="With -d, resolve and report the download without transferring it."
+    ),
     flag: str = typer.Option(
         None, "--flag", "-f", 
         help="Flag token to submit."
@@ -113,20 +151,51 @@ def machine(
     writeups: bool = typer.Option(
         False, "--writeups", "-w",
         help="Fetch community writeups for a machine (Requires -v)."
+    ),
+    watch: bool = typer.Option(
+        False, "--watch",
+        help="Poll for newly released or changed machines and emit them as JSONL events."
+    ),
+    interval: int = typer.Option(
+        300, "--interval",
+        help="Base polling interval in seconds for --watch (backs off while idle)."
+    ),
+    hook: str = typer.Option(
+        None, "--hook",
+        help="Shell command receiving each --watch event as JSON on stdin."
+    ),
+    http2: bool = typer.Option(
+        False, "--http2",
+        help="Use HTTP/2 multiplexing to hackmyvm.eu (requires the 'h2' package)."
+    ),
+    show_help: bool = typer.Option(
+        False, "--help", "-h",
+        is_eager=True, expose_value=False, callback=machine_help,
+        help="Show this message and exit."
     )
 ):
     """
     [bold green]Manage and interact[/bold green] with HackMyVM machines.
     """
+    # Watch mode keeps stdout for the JSONL event stream, so everything else goes to stderr.
+    out = Console(stderr=True) if watch else console
+    out.print(get_banner(__version__, __author__, __github_url__))
+    auth = AuthManager(console=out)
+
     async def run():
         session = None
         try:
-            session = await auth.get_session()
+            session = await auth.get_session(http2=http2)
             if not session: return
 
+            if watch:
+                manager = WatchManager(session, auth=auth)
+                await manager.watch(interval=interval, hook=hook)
+                return
+
             if writeups:
                 if not vm:
-                    console.print("[bold red][!][/bold red] Error: Target VM name (-v) is required to fetch writeups.")
+                    out.print("[bold red][!][/bold red] Error: Target VM name (-v) is required to fetch writeups.")
                 else:
                     manager = WriteupManager(session)
                     await manager.get_writeups(vm)
@@ -134,20 +203,32 @@ def machine(
 
             if flag:
                 if not vm:
-                    console.print("[bold red][!][/bold red] Error: Target VM name (-v) is required.")
+                    out.print("[bold red][!][/bold red] Error: Target VM name (-v) is required.")
                 else:
                     manager = FlagManager(session)
                     await manager.submit(vm, flag)
                 return
 
             if vm and not (flag or writeups):
-                console.print(f"[bold red][!][/bold red] Error: Target VM '[bold white]{vm}[/bold white]' specified without an action.")
-                console.print("[yellow][*][/yellow] Please provide an action: use [cyan]-f <flag>[/cyan] to submit or [cyan]-w[/cyan] to fetch writeups.")
+                out.print(f"[bold red][!][/bold red] Error: Target VM '[bold white]{vm}[/bold white]' specified without an action.")
+                out.print("[yellow][*][/yellow] Please provide an action: use [cyan]-f <flag>[/cyan] to submit or [cyan]-w[/cyan] to fetch writeups.")
+                return
+
+            if plan_download:
+                vm_names = [v.strip() for item in plan_download for v in item.split(",") if v.strip()]
+                manager = DownloadManager(session)
+                try:
+                    await manager.plan(vm_names)
+                finally:
+                    manager.close()
                 return
 
             if download:
                 manager = DownloadManager(session)
-                await manager.download_vm(download)
+                try:
+                    await manager.download_vm(download, dry_run=dry_run)
+                finally:
+                    manager.close()
                 return
 
             if list_machines or sort or all_machines or search:
@@ -155,16 +236,24 @@ def machine(
                 machines_to_show = []
                 info_text = ""
 
-                sem = asyncio.Semaphore(3)
-                async def scraper_task(p, level):
-                    async with sem:
-                        return await scraper.get_machines(page=p, level=level)
+                detail_sorts = ["released", "rating"]
+                s_low = sort.lower() if sort else ""
+                show_details = with_details or s_low in detail_sorts
+                list_level = None if s_low in detail_sorts else sort
 
+                lookup = MachineLookup(scraper)
                 is_fetch_all = all_machines or (sort and sort.lower() == "all") or search
 
-                if is_fetch_all:
+                if search and fuzzy:
+                    with out.status(f"[bold green]Ranking names similar to '{search}'..."):
+                        if lookup.is_stale():
+                            await lookup.build_index()
+                        ranked = lookup.suggest(search)
+                    machines_to_show = [dict(m, status="TO HACK") for m, _ in ranked]
+                    info_text = f"Suggestions: {len(machines_to_show)}"
+                elif is_fetch_all:
                     difficulties = ["beginner", "intermediate", "advanced"]
-                    categories_needing_all = difficulties + ["all", "size", "linux", "windows"]
+                    categories_needing_all = difficulties + detail_sorts + ["all", "size", "linux", "windows"]
                     
                     if search or (sort and sort.lower() in categories_needing_all) or (all_machines and not sort):
                         target_level = "all"
@@ -174,51 +263,48 @@ def machine(
                     status_msg = "Fetching full machine catalog..."
                     if search: status_msg = f"Searching for '{search}'..."
                     
-                    with console.status(f"[bold green]{status_msg}"):
-                        first_page, pages_info = await scraper.get_machines(page=1, level=target_level)
-                        machines_to_show.extend(first_page)
-                        try: total_pages = int(pages_info.split("/")[-1])
-                        except: total_pages = 1
-                        
-                        if total_pages > 1:
-                            tasks = [scraper_task(p, target_level) for p in range(2, total_pages + 1)]
-                            results = await asyncio.gather(*tasks)
-                            for p_machines, _ in results:
-                                machines_to_show.extend(p_machines)
-                        
-                        seen_names = set()
-                        unique_machines = []
-                        for m in machines_to_show:
-                            m_key = m['name'].strip().lower()
-                            if m_key not in seen_names:
-                                unique_machines.append(m)
-                                seen_names.add(m_key)
-                        machines_to_show = unique_machines
-
-                        if sort:
-                            s_low = sort.lower()
-                            if s_low in ["linux", "windows"]:
-                                machines_to_show = [m for m in machines_to_show if m.get('os') == s_low]
-                            elif s_low in difficulties:
-                                machines_to_show = [m for m in machines_to_show if m['difficulty'].lower() == s_low]
-                            elif s_low == "size":
-                                def parse_size(s):
-                                    try: return float(s.split()[0])
-                                    except: return 0.0
-                                machines_to_show.sort(key=lambda x: parse_size(x['size']))
-
+                    def keep(m):
+                        if s_low in ["linux", "windows"] and m.get('os') != s_low:
+                            return False
+                        if s_low in difficulties and m['difficulty'].lower() != s_low:
+                            return False
+                        if search and search.lower() not in m['name'].lower():
+                            return False
+                        return True
+
+                    # Filter while streaming so only matching records are ever kept.
+                    def collect(m):
+                        if keep(m):
+                            machines_to_show.append(m)
+
+                    with out.status(f"[bold green]{status_msg}"):
                         if search:
-                            machines_to_show = [
-                                m for m in machines_to_show 
-                                if search.lower() in m['name'].lower()
-                            ]
+                            exact = await lookup.find_exact(search, level=target_level, on_record=collect)
+                            if exact:
+                                machines_to_show = [exact] if keep(exact) else []
+                        else:
+                            async for m in scraper.iter_machines(level=target_level):
+                                collect(m)
+
+                        if s_low == "size":
+                            # Prefer exact byte counts cached by --plan-download over the rounded listing size.
+                            downloads = DownloadCache()
+                            units = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+                            def parse_size(m):
+                                exact = downloads.cached_size(m['name'])
+                                if exact: return float(exact)
+                                try:
+                                    value, unit = m['size'].split()[:2]
+                                    return float(value) * units.get(unit.upper(), 1)
+                                except: return 0.0
+                            machines_to_show.sort(key=parse_size)
                         
                         info_text = f"Total Found: {len(machines_to_show)}"
                 else:
-                    with console.status(f"[bold green]Fetching data..."):
-                        machines_to_show, pages_info = await scraper.get_machines(page=page, level=sort)
+                    with out.status(f"[bold green]Fetching data..."):
+                        machines_to_show, pages_info = await scraper.get_machines(page=page, level=list_level)
                     
-                    if sort and len(machines_to_show) > 20:
+                    if list_level and len(machines_to_show) > 20:
                         per_page = 20
                         total_count = len(machines_to_show)
                         total_pages = (total_count + per_page - 1) // per_page
@@ -230,27 +316,36 @@ def machine(
                         info_text = f"Page {pages_info}"
 
                 if machines_to_show and (not sort or sort.lower() != "hacked"):
-                    with console.status("[bold blue]Syncing pwned status..."):
-                        h_first_page, h_pages_info = await scraper.get_machines(page=1, level="hacked")
-                        all_hacked = list(h_first_page)
-                        try: h_total_pages = int(h_pages_info.split("/")[-1])
-                        except: h_total_pages = 1
-                        if h_total_pages > 1:
-                            h_tasks = [scraper_task(p, "hacked") for p in range(2, h_total_pages + 1)]
-                            h_results = await asyncio.gather(*h_tasks)
-                            for hp_machines, _ in h_results:
-                                all_hacked.extend(hp_machines)
-                        
-                        hacked_map = {m['name'].strip().lower(): m['status'] for m in all_hacked}
+                    with out.status("[bold blue]Syncing pwned status..."):
+                        hacked_map = {}
+                        async for m in scraper.iter_machines(level="hacked"):
+                            hacked_map[m['name'].strip().lower()] = m['status']
                         for m in machines_to_show:
                             m_name_clean = m['name'].strip().lower()
                             if m_name_clean in hacked_map:
                                 m['status'] = hacked_map[m_name_clean]
 
                 if not machines_to_show:
-                    console.print(f"[bold red][!][/bold red] No machines found matching your criteria.")
+                    out.print(f"[bold red][!][/bold red] No machines found matching your criteria.")
+                    if search and not fuzzy:
+                        if lookup.is_stale():
+                            with out.status("[bold green]Refreshing the name index..."):
+                                await lookup.build_index()
+                        suggestions = [m['name'] for m, _ in lookup.suggest(search, limit=5)]
+                        if suggestions:
+                            out.print(f"[yellow][*][/yellow] Did you mean: [cyan]{', '.join(suggestions)}[/cyan]?")
                     return
 
+                if show_details:
+                    with out.status(f"[bold blue]Fetching details for {len(machines_to_show)} machines..."):
+                        await MachineDetails(session).enrich(machines_to_show)
+                    if s_low in detail_sorts and all(m.get(s_low) is None for m in machines_to_show):
+                        out.print(f"[bold yellow][!][/bold yellow] No machine page exposed a labelled {s_low} value; keeping the listing order.")
+                    elif s_low == "released":
+                        machines_to_show.sort(key=lambda x: x['released'] or "", reverse=True)
+                    elif s_low == "rating":
+                        machines_to_show.sort(key=lambda x: x['rating'] or 0.0, reverse=True)
+
                 from rich.table import Table
                 title = f"HMV Machines ({info_text})"
                 if sort: title += f" | Filter: {sort.upper()}"
@@ -262,24 +357,39 @@ def machine(
                 table.add_column("Creator", style="magenta")
                 table.add_column("Size", style="green")
                 table.add_column("Status")
+                if show_details:
+                    table.add_column("Released", style="dim")
+                    table.add_column("Rating", justify="right")
+                    table.add_column("Flags", justify="right")
+                    table.add_column("Writeups", justify="right")
+
+                def cell(value):
+                    return "-" if value is None else str(value)
 
                 for m in machines_to_show:
                     diff = m['difficulty'].lower()
                     diff_color = "green" if "beginner" in diff else "orange3" if "inter" in diff else "red" if "adv" in diff else "white"
                     raw_status = m['status'].upper()
                     status_color = "bright_green" if any(s in raw_status for s in ["DONE", "PWNED"]) else "yellow"
-                    table.add_row(m['name'], f"[{diff_color}]{m['difficulty'].upper()}[/{diff_color}]", m['creator'], m['size'], f"[{status_color}]{raw_status}[/]")
-                console.print(table)
+                    row = [m['name'], f"[{diff_color}]{m['difficulty'].upper()}[/{diff_color}]", m['creator'], m['size'], f"[{status_color}]{raw_status}[/]"]
+                    if show_details:
+                        row += [cell(m.get(field)) for field in ["released", "rating", "flags", "writeups_count"]]
+                    table.add_row(*row)
+                out.print(table)
             else:
-                console.print(ctx.get_help())
+                out.print(ctx.get_help())
 
         except Exception as e:
-            console.print(f"\n[bold red][!][/bold red] An unexpected error occurred: {e}")
+            out.print(f"\n[bold red][!][/bold red] An unexpected error occurred: {e}")
         finally:
             if session:
                 await session.aclose()
 
-    asyncio.run(run())
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        # Managers have already stopped cleanly and reported; exit like an interrupted shell command.
+        raise typer.Exit(code=130)
 
 def main():
     app()
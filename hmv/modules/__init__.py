@@ -17,6 +17,11 @@ from .scraper import MachineScraper
 from .download import DownloadManager
 from .flag import FlagManager
 from .writeups import WriteupManager
+from .catalog import CatalogStore
+from .watch import WatchManager
+from .lookup import MachineLookup
+from .details import MachineDetails
+from .cache import DownloadCache
 
 __all__ = [
     "AuthManager",
@@ -24,6 +29,11 @@ __all__ = [
     "DownloadManager",
     "FlagManager",
     "WriteupManager",
+    "CatalogStore",
+    "WatchManager",
+    "MachineLookup",
+    "MachineDetails",
+    "DownloadCache",
     "__tool_name__",
     "__version__",
     "__author__",
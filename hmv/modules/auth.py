@@ -2,13 +2,18 @@ import httpx
 import keyring
 import os
 import json
+from typing import Optional, Tuple
 from rich.console import Console
 from keyring.errors import NoKeyringError
 
+from .client import create_client
+
 console = Console()
 
 class AuthManager:
-    def __init__(self):
+    def __init__(self, console: Console = console):
+        # Commands that stream data on stdout (watch mode) swap in a stderr console.
+        self.console = console
         self.app_name = "hmv-cli"
         self.config_dir = os.path.expanduser("~/.hmv")
         self.config_file = os.path.join(self.config_dir, "config.json")
@@ -22,23 +27,23 @@ class AuthManager:
                 json.dump({"username": username}, f)
             
             keyring.set_password(self.app_name, username, password)
-            console.print("[bold green][✓][/bold green] Configuration saved successfully!")
+            self.console.print("[bold green][✓][/bold green] Configuration saved successfully!")
             
         except NoKeyringError:
-            console.print("[bold red][!][/bold red] Error: Keyring storage system not found.")
-            console.print("[yellow][*][/yellow] Linux users, please use the following commands:")
-            console.print("\n    [bold cyan]If using pipx:[/bold cyan]")
-            console.print("    [white]pipx inject hmv keyrings.alt[/white]")
-            console.print("\n    [bold cyan]If using uv:[/bold cyan]")
-            console.print("    [white]uv tool install --with keyrings.alt git+https://github.com/setyanoegraha/hackmyvm-commandlineinterface.git[/white]")
+            self.console.print("[bold red][!][/bold red] Error: Keyring storage system not found.")
+            self.console.print("[yellow][*][/yellow] Linux users, please use the following commands:")
+            self.console.print("\n    [bold cyan]If using pipx:[/bold cyan]")
+            self.console.print("    [white]pipx inject hmv keyrings.alt[/white]")
+            self.console.print("\n    [bold cyan]If using uv:[/bold cyan]")
+            self.console.print("    [white]uv tool install --with keyrings.alt git+https://github.com/setyanoegraha/hackmyvm-commandlineinterface.git[/white]")
             
         except Exception as e:
-            console.print(f"[bold red][!][/bold red] Failed to save configuration to system vault.")
-            console.print(f"[dim]Error Detail: {e}[/dim]")
+            self.console.print(f"[bold red][!][/bold red] Failed to save configuration to system vault.")
+            self.console.print(f"[dim]Error Detail: {e}[/dim]")
 
-    async def get_session(self):
+    def load_credentials(self) -> Optional[Tuple[str, str]]:
         if not os.path.exists(self.config_file):
-            console.print("[bold red][!][/bold red] Configuration not found. Run '[cyan]hmv config[/cyan]' first.")
+            self.console.print("[bold red][!][/bold red] Configuration not found. Run '[cyan]hmv config[/cyan]' first.")
             return None
         
         try:
@@ -47,31 +52,26 @@ class AuthManager:
             
             password = keyring.get_password(self.app_name, username)
         except NoKeyringError:
-            console.print("[bold red][!][/bold red] Keyring backend not found.")
-            console.print("[yellow][*][/yellow] Run: [white]pipx inject hmv keyrings.alt[/white]")
+            self.console.print("[bold red][!][/bold red] Keyring backend not found.")
+            self.console.print("[yellow][*][/yellow] Run: [white]pipx inject hmv keyrings.alt[/white]")
             return None
         except Exception as e:
-            console.print(f"[bold red][!][/bold red] Error while accessing vault: {e}")
+            self.console.print(f"[bold red][!][/bold red] Error while accessing vault: {e}")
             return None
 
         if not password:
-            console.print("[bold red][!][/bold red] Password not found. Please run '[cyan]hmv config[/cyan]' again.")
+            self.console.print("[bold red][!][/bold red] Password not found. Please run '[cyan]hmv config[/cyan]' again.")
             return None
 
-        user_agent = (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0.0.0 Safari/537.36 HMV-CLI/0.1.2"
-        )
+        return username, password
+
+    async def login(self, client: httpx.AsyncClient) -> bool:
+        """Log the client in with the stored credentials. Also used to renew an expired session."""
+        credentials = self.load_credentials()
+        if not credentials:
+            return False
+        username, password = credentials
 
-        timeout = httpx.Timeout(60.0, connect=15.0)
-        client = httpx.AsyncClient(
-            base_url="https://hackmyvm.eu", 
-            follow_redirects=True, 
-            timeout=timeout,
-            headers={"User-Agent": user_agent}
-        )
-        
         try:
             resp = await client.post("/login/auth.php", data={
                 "admin": username, 
@@ -79,12 +79,22 @@ class AuthManager:
             })
             
             if "Logout" in resp.text:
-                return client
+                return True
             
-            console.print("[bold red][!][/bold red] Authentication failed. Please check your username and password.")
-            await client.aclose()
-            return None
+            self.console.print("[bold red][!][/bold red] Authentication failed. Please check your username and password.")
+            return False
         except Exception as e:
-            console.print(f"[bold red][!][/bold red] Connection error: {e}")
-            await client.aclose()
-            return None
\ No newline at end of file
+            self.console.print(f"[bold red][!][/bold red] Connection error: {e}")
+            return False
+
+    async def get_session(self, http2: bool = False):
+        if not os.path.exists(self.config_file):
+            self.console.print("[bold red][!][/bold red] Configuration not found. Run '[cyan]hmv config[/cyan]' first.")
+            return None
+
+        client = create_client(http2=http2, console=self.console)
+        if await self.login(client):
+            return client
+
+        await client.aclose()
+        return None
@@ -0,0 +1,52 @@
+import os
+import json
+import time
+from typing import Dict, Any, Optional
+
+RESOLVE_TTL = 24 * 3600
+
+class DownloadCache:
+    def __init__(self, path: Optional[str] = None, ttl: int = RESOLVE_TTL):
+        """
+        Resolved MEGA links, file names and exact sizes stored under ~/.hmv.
+        Kept apart from DownloadManager so listings can read exact sizes
+        without setting up the MEGA client.
+        """
+        self.config_dir = os.path.expanduser("~/.hmv")
+        self.cache_file = path or os.path.join(self.config_dir, "downloads.json")
+        self.ttl = ttl
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    @staticmethod
+    def key(vm_name: str) -> str:
+        return vm_name.strip().lower()
+
+    def load(self):
+        try:
+            with open(self.cache_file, "r") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        tmp_file = f"{self.cache_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_file, self.cache_file)
+
+    def get(self, vm_name: str) -> Optional[Dict[str, Any]]:
+        """Return the cached resolution for a VM if it is still fresh."""
+        entry = self.entries.get(self.key(vm_name))
+        if entry and time.time() - entry.get("resolved", 0) < self.ttl:
+            return entry
+        return None
+
+    def put(self, vm_name: str, entry: Dict[str, Any]):
+        self.entries[self.key(vm_name)] = entry
+
+    def cached_size(self, vm_name: str) -> Optional[int]:
+        """Exact byte count from a previous resolution, if still fresh."""
+        entry = self.get(vm_name)
+        return (entry.get("size") or None) if entry else None
@@ -0,0 +1,77 @@
+import os
+import json
+import time
+from typing import List, Dict, Any, Optional
+
+CATALOG_FIELDS = ("name", "creator", "size", "difficulty", "os")
+
+class CatalogStore:
+    def __init__(self, path: Optional[str] = None):
+        """
+        Local copy of the machine catalog stored under ~/.hmv.
+        Only account-independent fields are kept, so the pwned status of the
+        logged-in user never shows up as a catalog change.
+        """
+        self.config_dir = os.path.expanduser("~/.hmv")
+        self.catalog_file = path or os.path.join(self.config_dir, "catalog.json")
+        self.machines: Dict[str, Dict[str, Any]] = {}
+        # Set only by a full crawl; partial snapshots (e.g. the watch baseline) stay incomplete.
+        self.complete = False
+        self.updated = 0
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self.machines)
+
+    @staticmethod
+    def key(name: str) -> str:
+        return name.strip().lower()
+
+    @staticmethod
+    def compact(machine: Dict[str, Any]) -> Dict[str, Any]:
+        return {field: machine.get(field, "") for field in CATALOG_FIELDS}
+
+    def load(self):
+        try:
+            with open(self.catalog_file, "r") as f:
+                data = json.load(f)
+            self.machines = data.get("machines", {})
+            self.complete = bool(data.get("complete", False))
+            self.updated = int(data.get("updated", 0))
+        except (OSError, ValueError, AttributeError):
+            self.machines = {}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.catalog_file), exist_ok=True)
+        self.updated = int(time.time())
+        tmp_file = f"{self.catalog_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump({"updated": self.updated, "complete": self.complete, "machines": self.machines}, f)
+        os.replace(tmp_file, self.catalog_file)
+
+    def is_fresh(self, ttl: int) -> bool:
+        """True when the store holds a full crawl that is younger than `ttl` seconds."""
+        return self.complete and time.time() - self.updated < ttl
+
+    def diff(self, machines: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return 'new' and 'changed' events for records that differ from the stored catalog."""
+        events = []
+        for m in machines:
+            record = self.compact(m)
+            previous = self.machines.get(self.key(record["name"]))
+            if previous is None:
+                events.append({"event": "new", "machine": record})
+            elif previous != record:
+                events.append({"event": "changed", "machine": record, "previous": previous})
+        return events
+
+    def replace(self, machines: List[Dict[str, Any]]):
+        """Swap in the result of a full crawl, dropping machines that are gone."""
+        self.machines = {}
+        self.update(machines)
+        self.complete = True
+
+    def update(self, machines: List[Dict[str, Any]]):
+        for m in machines:
+            record = self.compact(m)
+            self.machines[self.key(record["name"])] = record
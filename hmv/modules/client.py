@@ -0,0 +1,92 @@
+import ssl
+import httpx
+import requests
+from typing import Optional
+from requests.adapters import HTTPAdapter
+from rich.console import Console
+
+console = Console()
+
+BASE_URL = "https://hackmyvm.eu"
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36 HMV-CLI/0.1.2"
+)
+
+# Sized for the widest crawl fan-out (5 machine pages in flight) plus a
+# few spare sockets for the pwned-status sync and download resolution.
+MAX_CONNECTIONS = 10
+KEEPALIVE_EXPIRY = 30.0
+
+_ssl_context: Optional[ssl.SSLContext] = None
+
+def get_ssl_context() -> ssl.SSLContext:
+    """
+    One TLS context for the whole process, so the CA bundle is loaded once
+    and every client (including short-lived ones) shares the same settings.
+    It does not resume TLS sessions; connection reuse comes from the pool.
+    """
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = httpx.create_ssl_context()
+    return _ssl_context
+
+def accept_encoding() -> str:
+    """Advertise brotli only when a decoder is installed, gzip always."""
+    try:
+        import brotli  # noqa: F401
+        return "br, gzip, deflate"
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            return "br, gzip, deflate"
+        except ImportError:
+            return "gzip, deflate"
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def create_client(
+    http2: bool = False, max_connections: int = MAX_CONNECTIONS, base_url: str = BASE_URL, console: Console = console
+) -> httpx.AsyncClient:
+    """
+    Build the AsyncClient shared by every manager.
+    HTTP/2 is opt-in and needs the 'h2' package (the 'http2' extra);
+    without it the client falls back to pooled HTTP/1.1 keep-alive connections.
+    """
+    if http2 and not http2_available():
+        console.print("[yellow][*][/yellow] HTTP/2 requested but 'h2' is not installed. Falling back to HTTP/1.1.")
+        console.print("[yellow][*][/yellow] Run: [white]pipx inject hmv h2[/white]")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=KEEPALIVE_EXPIRY
+    )
+    return httpx.AsyncClient(
+        base_url=base_url,
+        follow_redirects=True,
+        timeout=httpx.Timeout(60.0, connect=15.0),
+        limits=limits,
+        http2=http2,
+        verify=get_ssl_context(),
+        headers={"User-Agent": USER_AGENT, "Accept-Encoding": accept_encoding()}
+    )
+
+def create_mega_session(max_connections: int = MAX_CONNECTIONS) -> requests.Session:
+    """
+    Pooled requests session for MEGA API calls and transfers. requests
+    sessions are not thread-safe, so every worker thread gets its own.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": accept_encoding()})
+    return session
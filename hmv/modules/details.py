@@ -0,0 +1,204 @@
+from selectolax.lexbor import LexborHTMLParser, LexborNode as Node
+import httpx
+import os
+import re
+import json
+import time
+import asyncio
+from datetime import datetime
+from typing import List, Dict, Optional, Any, Union
+
+DETAIL_FIELDS = ("released", "rating", "flags", "writeups_count")
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%b %d %Y", "%d %b %Y", "%B %d %Y", "%d %B %Y")
+# Bumped whenever parse() changes, so cached results from an older parser are refetched.
+PARSE_VERSION = 2
+
+# Each info field is read only from an element labelled with one of these names,
+# either in the same element ("Rating: 4.5") or in the element right after the label.
+FIELD_LABELS = {
+    "released": r"release(?:d| date)?",
+    "rating": r"rating",
+    "flags": r"flags?|pwned by|hacked by",
+}
+FIELD_VALUES = {
+    "released": r"([0-9]{1,4}[-/.][0-9]{1,2}[-/.][0-9]{2,4}|[A-Za-z]{3,9} [0-9]{1,2},? [0-9]{4}|[0-9]{1,2} [A-Za-z]{3,9} [0-9]{4})",
+    "rating": r"([0-9]+(?:\.[0-9]+)?)(?: ?/ ?[0-9]+)?",
+    "flags": r"([0-9]+)(?: [A-Za-z]+)?",
+}
+# Page chrome and the writeup table never carry the machine's info fields.
+SKIP_TAGS = {"nav", "header", "footer", "form", "script", "style"}
+MAX_LABEL_TEXT = 80
+
+class MachineDetails:
+    def __init__(self, client: httpx.AsyncClient, ttl: int = 6 * 3600, concurrency: int = 5):
+        """
+        Fetch, parse and cache the per-VM page at /machines/machine.php.
+        One fetch feeds both the writeups view and the detail fields, and the
+        parsed result is kept in ~/.hmv/details.json for `ttl` seconds.
+        """
+        self.client = client
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.config_dir = os.path.expanduser("~/.hmv")
+        self.cache_file = os.path.join(self.config_dir, "details.json")
+        self.cache: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.cache_file, "r") as f:
+                self.cache = json.load(f)
+        except (OSError, ValueError):
+            self.cache = {}
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(self.config_dir, exist_ok=True)
+        tmp_file = f"{self.cache_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(self.cache, f)
+        os.replace(tmp_file, self.cache_file)
+        self.dirty = False
+
+    async def get(self, vm_name: str, refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Return parsed details for a VM, or None if the machine does not exist.
+        Raises httpx.HTTPStatusError when the server answers with an error status.
+        """
+        key = vm_name.strip().lower()
+        entry = self.cache.get(key)
+        if (entry and not refresh and entry.get("version") == PARSE_VERSION
+                and time.time() - entry.get("fetched", 0) < self.ttl):
+            return entry["details"]
+
+        resp = await self.client.get("/machines/machine.php", params={"vm": vm_name})
+        resp.raise_for_status()
+        if b"machine not found" in resp.content.lower():
+            return None
+
+        details = self.parse(resp.content)
+        details["name"] = vm_name
+        self.cache[key] = {"fetched": int(time.time()), "version": PARSE_VERSION, "details": details}
+        self.dirty = True
+        return details
+
+    async def enrich(self, machines: List[Dict[str, Any]], refresh: bool = False):
+        """Attach detail fields to listing records in place, with bounded concurrency."""
+        sem = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(m):
+            async with sem:
+                try:
+                    details = await self.get(m['name'], refresh=refresh)
+                except httpx.HTTPError:
+                    details = None
+            for field in DETAIL_FIELDS:
+                m[field] = details.get(field) if details else None
+
+        try:
+            await asyncio.gather(*[fetch(m) for m in machines])
+        finally:
+            self.save()
+
+    @staticmethod
+    def parse_date(text: str) -> Optional[str]:
+        text = re.sub(r",?\s+", " ", text.strip())
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(text, fmt).strftime("%Y-%m-%d")
+            except ValueError:
+                continue
+        return None
+
+    @staticmethod
+    def in_page_chrome(node: Node) -> bool:
+        parent = node
+        while parent is not None:
+            if parent.tag in SKIP_TAGS:
+                return True
+            if parent.tag == "table" and "table-striped" in (parent.attributes.get("class") or ""):
+                return True
+            parent = parent.parent
+        return False
+
+    @staticmethod
+    def next_element(node: Node) -> Optional[Node]:
+        sibling = node.next
+        while sibling is not None and sibling.tag in ("-text", "-comment"):
+            if sibling.tag == "-text" and sibling.text(strip=True):
+                return None
+            sibling = sibling.next
+        return sibling
+
+    def labelled_values(self, parser: LexborHTMLParser) -> Dict[str, str]:
+        """
+        Find the first labelled value of each info field: an element whose whole
+        text is "<label>: <value>", or a "<label>" element followed by a value element.
+        """
+        found: Dict[str, str] = {}
+        body = parser.body
+        if body is None:
+            return found
+
+        for node in body.traverse():
+            if len(found) == len(FIELD_LABELS):
+                break
+            text = " ".join(node.text(separator=" ").split())
+            if not text or len(text) > MAX_LABEL_TEXT or self.in_page_chrome(node):
+                continue
+
+            for field, label in FIELD_LABELS.items():
+                if field in found:
+                    continue
+                value = FIELD_VALUES[field]
+                match = re.fullmatch(rf"(?:{label})\s*:?\s*{value}", text, re.I)
+                if not match and re.fullmatch(rf"(?:{label})\s*:?", text, re.I):
+                    sibling = self.next_element(node)
+                    if sibling is not None:
+                        match = re.fullmatch(value, " ".join(sibling.text(separator=" ").split()))
+                if match:
+                    found[field] = match.group(1)
+        return found
+
+    def parse(self, html: Union[str, bytes]) -> Dict[str, Any]:
+        """
+        Parse the machine page once: the writeup table plus the labelled
+        info fields (release date, rating, flags). Fields without a matching
+        label outside the page chrome are left as None.
+        """
+        parser = LexborHTMLParser(html)
+
+        writeups = []
+        for row in parser.css("table.table-striped tbody tr"):
+            date_node = row.css_first("th[scope='row']")
+            date_val = date_node.text(strip=True) if date_node else "N/A"
+
+            author_node = row.css_first("a.creator")
+            author_name = author_node.text(strip=True) if author_node else "Unknown"
+
+            link_node = row.css_first("a.download")
+            lang_node = row.css_first("span.size")
+
+            if link_node:
+                href = str(link_node.attributes.get("href") or "")
+                format_val = link_node.text(strip=True).replace("!", "")
+                language = lang_node.text(strip=True) if lang_node else "Unknown"
+
+                writeups.append({
+                    "date": date_val,
+                    "author": author_name,
+                    "language": language,
+                    "format": format_val,
+                    "url": href
+                })
+
+        values = self.labelled_values(parser)
+        return {
+            "released": self.parse_date(values["released"]) if "released" in values else None,
+            "rating": float(values["rating"]) if "rating" in values else None,
+            "flags": int(values["flags"]) if "flags" in values else None,
+            "writeups_count": len(writeups),
+            "writeups": writeups
+        }
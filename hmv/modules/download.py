@@ -1,10 +1,15 @@
 import httpx
 import os
+import json
+import shutil
 import asyncio
 import time
-import tempfile
-import glob
-from rich.prompt import Confirm
+import signal
+import threading
+import requests
+from urllib.parse import urljoin
+from typing import List, Dict, Optional, Any, IO
+from rich.table import Table
 
 if not hasattr(asyncio, "coroutine"):
     def coroutine_dummy(f):
@@ -12,6 +17,10 @@ if not hasattr(asyncio, "coroutine"):
     setattr(asyncio, "coroutine", coroutine_dummy) # type: ignore
 
 from mega import Mega
+from mega.errors import RequestError
+from mega.crypto import base64_to_a32, a32_to_str, str_to_a32, get_chunks
+from Crypto.Cipher import AES
+from Crypto.Util import Counter
 from rich.console import Console
 from rich.progress import (
     Progress,
@@ -23,54 +32,367 @@ from rich.progress import (
     SpinnerColumn,
 )
 
+from .client import create_mega_session
+from .cache import DownloadCache
+
 console = Console()
 
+MAX_REDIRECTS = 5
+API_RETRIES = 5
+
+def format_bytes(size: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+def acquire_lock(path: str) -> Optional[IO]:
+    """
+    Take a non-blocking OS-level lock on `path`, or return None if another
+    process holds it. The OS releases it automatically if the process dies.
+    """
+    handle = open(path, "a+")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+def release_lock(handle: IO):
+    try:
+        if os.name == "nt":
+            import msvcrt
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    finally:
+        handle.close()
+
+class PooledMega(Mega):
+    def __init__(self, session: requests.Session, options: Optional[Dict[str, Any]] = None):
+        """
+        mega.py client whose API calls go through the given requests session
+        instead of the module-level requests API, which opens a new
+        connection for every call. Sessions are not thread-safe, so each
+        worker thread needs its own instance.
+        """
+        super().__init__(options)
+        self.session = session
+
+    def _api_request(self, data):
+        if not isinstance(data, list):
+            data = [data]
+
+        for attempt in range(API_RETRIES):
+            params = {"id": self.sequence_num}
+            self.sequence_num += 1
+            if self.sid:
+                params["sid"] = self.sid
+
+            response = self.session.post(
+                f"{self.schema}://g.api.{self.domain}/cs",
+                params=params,
+                data=json.dumps(data),
+                timeout=self.timeout
+            )
+            json_resp = response.json()
+
+            code = json_resp if isinstance(json_resp, int) else None
+            if isinstance(json_resp, list) and json_resp and isinstance(json_resp[0], int):
+                code = json_resp[0]
+            if code is None:
+                return json_resp[0]
+            if code == 0:
+                return code
+            if code != -3:
+                raise RequestError(code)
+            # -3 means the API is busy; back off and try again.
+            time.sleep(min(2 ** (attempt + 1), 30))
+
+        raise RuntimeError("MEGA API is busy, try again later.")
+
+class LinkUnavailableError(RuntimeError):
+    """The MEGA link no longer resolves to a downloadable file."""
+
+class MegaTransfer:
+    def __init__(self, mega: Mega, http, mega_url: str, file_name: str, dest_dir: str = "."):
+        """
+        A single MEGA download with its own work directory and cancel token.
+        Decrypted data and the running MAC are checkpointed after every chunk
+        in `.<file>.hmv-part/`, so an interrupted transfer resumes where it stopped.
+        """
+        self.mega = mega
+        self.http = http
+        self.mega_url = mega_url
+        self.file_name = file_name
+        self.dest_path = os.path.join(dest_dir, file_name)
+        self.work_dir = os.path.join(dest_dir, f".{file_name}.hmv-part")
+        self.data_file = os.path.join(self.work_dir, "data")
+        self.state_file = os.path.join(self.work_dir, "state.json")
+        self.lock_file = os.path.join(self.work_dir, "lock")
+        self.cancel = threading.Event()
+        self.downloaded = 0
+        self.size = 0
+
+    def load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_file, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self, offset: int, mac: bytes):
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump({"url": self.mega_url, "size": self.size, "offset": offset, "mac": mac.hex()}, f)
+        os.replace(tmp_file, self.state_file)
+
+    def run(self) -> bool:
+        """
+        Blocking transfer, meant for a worker thread.
+        Returns True when the file is complete, False when it was cancelled.
+        """
+        os.makedirs(self.work_dir, exist_ok=True)
+        lock = acquire_lock(self.lock_file)
+        if lock is None:
+            raise RuntimeError(f"'{self.file_name}' is already being downloaded by another process.")
+        try:
+            # Another process may have finished this file while we waited for the lock.
+            if os.path.exists(self.dest_path):
+                raise FileExistsError(f"File '{self.file_name}' already exists.")
+            completed = self._transfer()
+            if completed:
+                # Clean up while still holding the lock, so no other process can adopt the work dir.
+                shutil.rmtree(self.work_dir, ignore_errors=True)
+        finally:
+            release_lock(lock)
+        if completed and os.name == "nt":
+            # Windows cannot delete the lock file while it is open.
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+        return completed
+
+    def _read_exact(self, stream, size: int) -> bytes:
+        data = b""
+        while len(data) < size:
+            part = stream.read(size - len(data))
+            if not part:
+                raise IOError("Connection closed before the transfer completed.")
+            data += part
+        return data
+
+    def _transfer(self) -> bool:
+        file_handle, file_key = self.mega._parse_url(self.mega_url).split("!")
+        key = base64_to_a32(file_key)
+        try:
+            file_data = self.mega._api_request({"a": "g", "g": 1, "p": file_handle})
+        except RequestError as e:
+            raise LinkUnavailableError(f"MEGA rejected the link: {e}") from e
+        if not isinstance(file_data, dict) or "g" not in file_data:
+            raise LinkUnavailableError("File not accessible anymore.")
+
+        k = (key[0] ^ key[4], key[1] ^ key[5], key[2] ^ key[6], key[3] ^ key[7])
+        iv = key[4:6] + (0, 0)
+        meta_mac = key[6:8]
+        k_str = a32_to_str(k)
+        iv_str = a32_to_str([iv[0], iv[1], iv[0], iv[1]])
+        self.size = file_data["s"]
+
+        offset, mac_str = 0, b"\0" * 16
+        state = self.load_state()
+        if (state.get("url") == self.mega_url and state.get("size") == self.size
+                and os.path.exists(self.data_file) and os.path.getsize(self.data_file) >= state.get("offset", 0)):
+            offset, mac_str = state["offset"], bytes.fromhex(state["mac"])
+        self.downloaded = offset
+
+        if offset < self.size:
+            # CTR mode lets decryption start at any 16-byte block; chunk boundaries always are.
+            counter = Counter.new(128, initial_value=(((iv[0] << 32) + iv[1]) << 64) + offset // 16)
+            aes = AES.new(k_str, AES.MODE_CTR, counter=counter)
+            mac_encryptor = AES.new(k_str, AES.MODE_CBC, mac_str)
+
+            url = file_data["g"] if not offset else f"{file_data['g']}/{offset}-{self.size - 1}"
+            # The body is read raw, so ask for it unencoded even though the session advertises br/gzip.
+            headers = {"Accept-Encoding": "identity"}
+            with self.http.get(url, headers=headers, stream=True, timeout=(15, 60)) as resp, \
+                    open(self.data_file, "r+b" if offset else "wb") as out:
+                resp.raise_for_status()
+                out.truncate(offset)
+                out.seek(offset)
+                for chunk_start, chunk_size in get_chunks(self.size):
+                    if chunk_start < offset:
+                        continue
+                    if self.cancel.is_set():
+                        return False
+
+                    chunk = aes.decrypt(self._read_exact(resp.raw, chunk_size))
+                    out.write(chunk)
+                    out.flush()
+
+                    padded = chunk + b"\0" * (-len(chunk) % 16)
+                    chunk_mac = AES.new(k_str, AES.MODE_CBC, iv_str).encrypt(padded)[-16:]
+                    mac_str = mac_encryptor.encrypt(chunk_mac)
+
+                    self.downloaded = chunk_start + chunk_size
+                    self.save_state(self.downloaded, mac_str)
+
+        file_mac = str_to_a32(mac_str)
+        if (file_mac[0] ^ file_mac[1], file_mac[2] ^ file_mac[3]) != tuple(meta_mac):
+            # Corrupt partial data cannot be resumed; start over next time.
+            for path in (self.data_file, self.state_file):
+                try: os.remove(path)
+                except OSError: pass
+            raise ValueError("Mismatched MAC, the downloaded data is corrupt.")
+
+        if os.path.exists(self.dest_path):
+            raise FileExistsError(f"File '{self.file_name}' already exists.")
+        os.replace(self.data_file, self.dest_path)
+        return True
+
 class DownloadManager:
     def __init__(self, client: httpx.AsyncClient):
         """
         Initialize the Download Manager.
         """
         self.client = client
-        self.mega = Mega()
+        self.cache = DownloadCache()
+        self.transfers: List[MegaTransfer] = []
+        self.http = create_mega_session()
+        self.mega = PooledMega(self.http)
+
+    def close(self):
+        """Release the pooled MEGA connections once planning or downloading is done."""
+        self.http.close()
+
+    def cancel_all(self):
+        """Ask every running transfer to stop at its next chunk boundary."""
+        for transfer in self.transfers:
+            transfer.cancel.set()
 
-    async def download_vm(self, vm_name: str):
+    async def resolve_link(self, vm_name: str) -> str:
         """
-        Download a VM machine with an accurate progress bar and robust error handling
-        for both Windows and Linux.
+        Follow the downloads.hackmyvm.eu redirect chain by its Location headers
+        only, stopping as soon as it points at MEGA, so no page body is fetched.
         """
-        hmv_url = f"https://downloads.hackmyvm.eu/{vm_name.lower()}.zip"
+        url = f"https://downloads.hackmyvm.eu/{vm_name.lower()}.zip"
+        for _ in range(MAX_REDIRECTS):
+            if "mega.nz" in url:
+                return url
+            async with self.client.stream("GET", url, follow_redirects=False) as response:
+                location = response.headers.get("location")
+            if not location:
+                break
+            url = urljoin(url, location)
+        if "mega.nz" in url:
+            return url
+        raise ValueError("Valid MEGA link not found.")
 
-        mega_url = ""
-        with console.status(f"[bold yellow][*][/bold yellow] Resolving download link for {vm_name}..."):
+    async def resolve(self, vm_name: str, refresh: bool = False, mega: Optional[PooledMega] = None) -> Dict[str, Any]:
+        """
+        Resolve the MEGA link, file name and exact size of a VM.
+        The blocking mega.py metadata call runs in a worker thread and the
+        result is cached in ~/.hmv/downloads.json for later downloads.
+        Concurrent callers must pass their own `mega` client.
+        """
+        entry = self.cache.get(vm_name)
+        if entry and not refresh:
+            return entry
+
+        mega_url = await self.resolve_link(vm_name)
+
+        # Metadata errors propagate so callers can report them instead of a bogus size.
+        file_name = f"{vm_name}.zip"
+        total_size = 0
+        info = await asyncio.to_thread((mega or self.mega).get_public_url_info, mega_url)
+        if info:
+            total_size = info.get('size', 0)
+            file_name = info.get('name', file_name).replace("/", "").replace("\\", "")
+
+        entry = {"url": mega_url, "name": file_name, "size": total_size, "resolved": int(time.time())}
+        if total_size:
+            self.cache.put(vm_name, entry)
+        return entry
+
+    async def plan(self, vm_names: List[str], concurrency: int = 4, refresh: bool = False):
+        """
+        Resolve many VMs at once and report total bytes against free disk space,
+        without downloading anything.
+        """
+        # One client (and session) per concurrent resolver, handed out like a semaphore.
+        clients: asyncio.Queue = asyncio.Queue()
+        for _ in range(min(concurrency, len(vm_names)) or 1):
+            clients.put_nowait(PooledMega(create_mega_session(max_connections=1)))
+
+        async def task(vm_name):
+            mega = await clients.get()
             try:
-                response = await self.client.get(hmv_url, follow_redirects=True)
-                mega_url = str(response.url)
-                if "mega.nz" not in mega_url:
-                    console.print(f"[bold red][!][/bold red] Error: Valid MEGA link not found.")
-                    return
+                return vm_name, await self.resolve(vm_name, refresh=refresh, mega=mega), None
             except Exception as e:
-                console.print(f"[bold red][!][/bold red] URL resolution failed: {e}")
-                return
-
-        console.print(f"[bold blue][*][/bold blue] Resolved Link: [cyan]{mega_url}[/cyan]")
+                return vm_name, None, e
+            finally:
+                clients.put_nowait(mega)
 
         try:
-            with console.status("[bold blue][*][/bold blue] Fetching file metadata..."):
-                info = self.mega.get_public_url_info(mega_url)
-                if info:
-                    total_size = info.get('size', 0)
-                    file_name = info.get('name', f"{vm_name}.zip").replace("/", "").replace("\\", "")
-                else:
-                    total_size = 0
-                    file_name = f"{vm_name}.zip"
-        except Exception:
-            total_size = 0
-            file_name = f"{vm_name}.zip"
-
-        if os.path.exists(file_name):
-            console.print(f"[bold red][!][/bold red] Error: File '[white]{file_name}[/white]' already exists.")
-            return
+            with console.status(f"[bold yellow][*][/bold yellow] Resolving {len(vm_names)} download links..."):
+                results = await asyncio.gather(*[task(vm) for vm in vm_names])
+        finally:
+            while not clients.empty():
+                clients.get_nowait().session.close()
+        try:
+            self.cache.save()
+        except OSError:
+            pass
+
+        table = Table(title="Download Plan", title_style="bold blue", header_style="white")
+        table.add_column("VM Name", style="cyan")
+        table.add_column("File")
+        table.add_column("Size", justify="right", style="green")
+        table.add_column("Status")
+
+        total_bytes = 0
+        unknown = 0
+        for vm_name, entry, error in results:
+            if error or entry is None:
+                table.add_row(vm_name, "-", "-", f"[red]{error}[/red]")
+                unknown += 1
+                continue
+            size = entry.get("size", 0)
+            if os.path.exists(entry["name"]):
+                status = "[yellow]EXISTS[/yellow]"
+            elif not size:
+                status = "[yellow]UNKNOWN[/yellow]"
+                unknown += 1
+            else:
+                status = "[bright_green]READY[/bright_green]"
+                total_bytes += size
+            table.add_row(vm_name, entry["name"], format_bytes(size) if size else "?", status)
+        console.print(table)
+
+        free_bytes = shutil.disk_usage(os.getcwd()).free
+        total_text = f"at least {format_bytes(total_bytes)}" if unknown else format_bytes(total_bytes)
+        console.print(f"[bold blue][*][/bold blue] Total to download: [white]{total_text}[/white] | Free disk space: [white]{format_bytes(free_bytes)}[/white]")
+        if total_bytes > free_bytes:
+            console.print(f"[bold red][!][/bold red] Not enough disk space: {format_bytes(total_bytes - free_bytes)} short.")
+        elif unknown:
+            console.print(f"[bold yellow][!][/bold yellow] Total is incomplete: {unknown} of {len(results)} sizes are unknown, so free space cannot be confirmed.")
+        else:
+            console.print("[bold green][✓][/bold green] Enough disk space for the planned downloads.")
 
+    async def run_transfer(self, vm_name: str, transfer: MegaTransfer, total_size: int = 0) -> bool:
+        """
+        Run a transfer in a worker thread behind a progress bar.
+        Returns True when the file is complete, False when its cancel token was set.
+        Task cancellation stops the worker first and is then re-raised.
+        """
         progress = Progress(
             SpinnerColumn(),
             TextColumn("[bold blue]{task.description}"),
@@ -85,84 +407,105 @@ class DownloadManager:
             transient=True 
         )
 
-        original_temp = tempfile.tempdir
-        tempfile.tempdir = os.getcwd()
-        
-        start_time = time.time()
-
+        self.transfers.append(transfer)
         try:
             with progress:
                 task_id = progress.add_task(f"Initializing {vm_name}...", total=total_size or None)
+                worker = asyncio.create_task(asyncio.to_thread(transfer.run))
 
-                download_task = asyncio.to_thread(
-                    self.mega.download_url, 
-                    mega_url, 
-                    dest_path=".", 
-                    dest_filename=file_name
-                )
-                actual_coro = asyncio.create_task(download_task)
-                
-                while not actual_coro.done():
-                    try:
-                        current_bytes = 0
-
-                        local_temps = glob.glob("megapy_*")
-                        local_dot_get = f"{file_name}.get"
-                        
-                        if os.path.exists(local_dot_get):
-                            current_bytes = os.path.getsize(local_dot_get)
-                        
-                        if current_bytes == 0 and local_temps:
-                            for f_path in local_temps:
-                                try:
-                                    if os.path.getmtime(f_path) >= (start_time - 1):
-                                        with open(f_path, 'ab') as f:
-                                            current_bytes = f.tell()
-                                        break
-                                except:
-                                    continue
-
-                        if current_bytes > 0:
+                try:
+                    while not worker.done():
+                        if transfer.downloaded:
                             progress.update(
-                                task_id, 
+                                task_id,
                                 description=f"Downloading {vm_name}",
-                                completed=min(current_bytes, total_size) if total_size else current_bytes
+                                total=transfer.size or total_size or None,
+                                completed=transfer.downloaded
                             )
-                        
-                        await asyncio.sleep(0.5)
-
-                    except (KeyboardInterrupt, asyncio.CancelledError):
-                        progress.stop()
-                        console.print("\n")
-                        if Confirm.ask("[bold red][?][/bold red] Interruption detected. Abort download?"):
-                            console.print("[bold red][!][/bold red] Aborted by user.")
-                            for f in glob.glob("megapy_*"):
-                                try: os.remove(f)
-                                except: pass
-                            os._exit(0)
-                        else:
-                            console.print("[bold green][*][/bold green] Resuming...")
-                            progress.start()
-                
+                        await asyncio.wait({worker}, timeout=0.5)
+                except asyncio.CancelledError:
+                    # Let the worker checkpoint and stop, then hand the cancellation back to the caller.
+                    transfer.cancel.set()
+                    progress.update(task_id, description=f"Stopping {vm_name}...")
+                    await worker
+                    raise
+
+                return await worker
+        finally:
+            self.transfers.remove(transfer)
+
+    def report_interrupted(self, vm_name: str, transfer: MegaTransfer):
+        console.print(f"[bold yellow][!][/bold yellow] Download of [white]{vm_name}[/white] interrupted at {format_bytes(transfer.downloaded)}.")
+        console.print(f"[yellow][*][/yellow] Partial data kept. Run [cyan]hmv machine -d {vm_name}[/cyan] again to resume.")
+
+    async def download_vm(self, vm_name: str, dry_run: bool = False):
+        """
+        Download a VM machine with an accurate progress bar and robust error handling
+        for both Windows and Linux.
+        """
+        if dry_run:
+            await self.plan([vm_name])
+            return
+
+        from_cache = self.cache.get(vm_name) is not None
+        with console.status(f"[bold yellow][*][/bold yellow] Resolving download link for {vm_name}..."):
+            try:
+                entry = await self.resolve(vm_name)
+            except Exception as e:
+                console.print(f"[bold red][!][/bold red] URL resolution failed: {e}")
+                return
+            try:
+                self.cache.save()
+            except OSError:
+                pass
+
+        # SIGINT already cancels this coroutine through asyncio.run; SIGTERM is
+        # routed to the cancel tokens where the event loop supports it.
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGTERM, self.cancel_all)
+            handles_sigterm = True
+        except (NotImplementedError, RuntimeError, ValueError):
+            handles_sigterm = False
+
+        transfer = None
+        try:
+            while True:
+                file_name = entry["name"]
+                console.print(f"[bold blue][*][/bold blue] Resolved Link: [cyan]{entry['url']}[/cyan]")
+                if os.path.exists(file_name):
+                    console.print(f"[bold red][!][/bold red] Error: File '[white]{file_name}[/white]' already exists.")
+                    return
+
+                transfer = MegaTransfer(self.mega, self.http, entry["url"], file_name)
                 try:
-                    await actual_coro
-                except Exception as e:
-                    if os.path.exists(file_name) and os.path.getsize(file_name) > 0:
-                        pass
-                    else:
-                        raise e
-                
-                if total_size:
-                    progress.update(task_id, completed=total_size)
-
-            console.print(f"[bold green][✓][/bold green] Successfully downloaded: [white]{file_name}[/white]")
+                    completed = await self.run_transfer(vm_name, transfer, entry["size"])
+                    break
+                except LinkUnavailableError:
+                    # A cached link may have been replaced since it was resolved; look it up once more.
+                    if not from_cache:
+                        raise
+                    from_cache = False
+                    with console.status(f"[bold yellow][*][/bold yellow] Cached link is stale, resolving {vm_name} again..."):
+                        entry = await self.resolve(vm_name, refresh=True)
+                        try:
+                            self.cache.save()
+                        except OSError:
+                            pass
+
+            if completed:
+                console.print(f"[bold green][✓][/bold green] Successfully downloaded: [white]{file_name}[/white]")
+            else:
+                self.report_interrupted(vm_name, transfer)
 
+        except asyncio.CancelledError:
+            if transfer and not os.path.exists(transfer.dest_path):
+                self.report_interrupted(vm_name, transfer)
+            raise
         except Exception as e:
             console.print(f"[bold red][!][/bold red] Download failed: {e}")
+            if transfer and transfer.downloaded:
+                console.print(f"[yellow][*][/yellow] Partial data kept. Run [cyan]hmv machine -d {vm_name}[/cyan] again to resume.")
         finally:
-            tempfile.tempdir = original_temp
-            time.sleep(0.5)
-            for f in glob.glob("megapy_*"):
-                if f != file_name:
-                    try: os.remove(f)
-                    except: pass
\ No newline at end of file
+            if handles_sigterm:
+                loop.remove_signal_handler(signal.SIGTERM)
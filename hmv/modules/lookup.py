@@ -0,0 +1,109 @@
+import os
+from typing import List, Dict, Tuple, Optional, Any, Set, Callable
+
+from .scraper import MachineScraper
+from .catalog import CatalogStore
+
+INDEX_TTL = 24 * 3600
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text.strip().lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def edit_distance(a: str, b: str) -> int:
+    """Classic Levenshtein distance with a single rolling row."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb)
+            ))
+        previous = current
+    return previous[-1]
+
+class MachineLookup:
+    def __init__(
+        self, scraper: MachineScraper, catalog: Optional[CatalogStore] = None,
+        concurrency: int = 3, ttl: int = INDEX_TTL
+    ):
+        """
+        Exact and typo-tolerant name lookups. The name index lives in its own
+        file (~/.hmv/names.json), separate from the watch baseline, and is
+        rebuilt from a full crawl once it is older than `ttl` seconds.
+        """
+        self.scraper = scraper
+        self.catalog = catalog or CatalogStore(os.path.join(os.path.expanduser("~/.hmv"), "names.json"))
+        self.concurrency = concurrency
+        self.ttl = ttl
+
+    def is_stale(self) -> bool:
+        return not self.catalog.is_fresh(self.ttl)
+
+    async def find_exact(
+        self, name: str, level: Optional[str] = None,
+        on_record: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Stream listing pages in order and stop at the first exact name match.
+        Pages fetched ahead are cancelled as soon as a hit is found, so a known
+        VM usually costs one request. Every non-matching record is passed to
+        `on_record`, so a miss leaves the caller with the full listing instead
+        of forcing a second crawl. A miss on the "all" level has seen every
+        machine, so it also refreshes a stale name index.
+        """
+        target = CatalogStore.key(name)
+        seed = level == "all" and self.is_stale()
+        seen = []
+        machines = self.scraper.iter_machines(level=level, concurrency=self.concurrency)
+        try:
+            async for m in machines:
+                if CatalogStore.key(m["name"]) == target:
+                    return m
+                if seed:
+                    seen.append(CatalogStore.compact(m))
+                if on_record:
+                    on_record(m)
+        finally:
+            await machines.aclose()
+
+        if seed:
+            self.catalog.replace(seen)
+            self.catalog.save()
+        return None
+
+    async def build_index(self) -> int:
+        """Crawl the full catalog and store it as the local name index."""
+        seen = [m async for m in self.scraper.iter_machines(level="all", concurrency=self.concurrency)]
+        self.catalog.replace(seen)
+        self.catalog.save()
+        return len(self.catalog)
+
+    def suggest(self, query: str, limit: int = 10) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Rank indexed names against a possibly misspelled query.
+        Trigram overlap drives the score, edit distance catches short names
+        and transpositions that share few trigrams.
+        """
+        q_key = CatalogStore.key(query)
+        q_grams = trigrams(q_key)
+        max_distance = max(2, len(q_key) // 3)
+
+        ranked = []
+        for key, record in self.catalog.machines.items():
+            grams = trigrams(key)
+            score = len(q_grams & grams) / len(q_grams | grams)
+            if q_key in key:
+                score = max(score, 0.5 + 0.5 * len(q_key) / len(key))
+            distance = edit_distance(q_key, key)
+            if distance <= max_distance:
+                score = max(score, 1 - distance / max(len(q_key), len(key)))
+            if score >= 0.3:
+                ranked.append((record, round(score, 3)))
+
+        ranked.sort(key=lambda r: (-r[1], r[0]["name"].lower()))
+        return ranked[:limit]
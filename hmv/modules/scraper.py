@@ -1,6 +1,8 @@
 from selectolax.lexbor import LexborHTMLParser
 import httpx
-from typing import List, Dict, Tuple, Optional, Any
+import asyncio
+from collections import deque
+from typing import List, Dict, Tuple, Optional, Any, AsyncIterator, Set, Union
 
 class MachineScraper:
     def __init__(self, client: httpx.AsyncClient):
@@ -18,7 +20,53 @@ class MachineScraper:
             params["l"] = level
         
         response = await self.client.get("/machines/", params=params)
-        parser = LexborHTMLParser(response.text)
+        # Parse the raw bytes so httpx never caches a decoded copy of the page.
+        return self.parse_machines(response.content, page)
+
+    async def iter_machines(self, level: Optional[str] = None, concurrency: int = 3) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream unique machine records page by page, in listing order.
+        At most `concurrency` pages are in flight and each page is dropped once
+        its records are yielded, so memory stays flat as the catalog grows.
+        Pages still pending when the consumer stops early are cancelled.
+        """
+        seen: Set[str] = set()
+
+        def fresh(machines: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            unique = []
+            for m in machines:
+                m_key = m['name'].strip().lower()
+                if m_key not in seen:
+                    seen.add(m_key)
+                    unique.append(m)
+            return unique
+
+        first_page, pages_info = await self.get_machines(page=1, level=level)
+        for m in fresh(first_page):
+            yield m
+        del first_page
+
+        try: total_pages = int(pages_info.split("/")[-1])
+        except: total_pages = 1
+
+        pending: deque = deque()
+        next_page = 2
+        try:
+            while next_page <= total_pages or pending:
+                while next_page <= total_pages and len(pending) < concurrency:
+                    pending.append(asyncio.create_task(self.get_machines(page=next_page, level=level)))
+                    next_page += 1
+                machines, _ = await pending.popleft()
+                for m in fresh(machines):
+                    yield m
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def parse_machines(self, html: Union[str, bytes], page: int = 1) -> Tuple[List[Dict[str, Any]], str]:
+        """Parse a machine listing page into records and pagination info."""
+        parser = LexborHTMLParser(html)
         
         machines = []
         for row in parser.css("table.table-dark tbody tr"):
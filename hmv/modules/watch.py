@@ -0,0 +1,132 @@
+import httpx
+import sys
+import json
+import time
+import asyncio
+import hashlib
+from typing import List, Dict, Any, Optional
+from rich.console import Console
+
+from .scraper import MachineScraper
+from .catalog import CatalogStore
+from .auth import AuthManager
+
+# Status output goes to stderr so stdout stays a clean JSONL event stream.
+console = Console(stderr=True)
+
+class WatchManager:
+    def __init__(self, client: httpx.AsyncClient, catalog: Optional[CatalogStore] = None, auth: Optional[AuthManager] = None):
+        self.client = client
+        self.auth = auth
+        self.scraper = MachineScraper(client)
+        self.catalog = catalog or CatalogStore()
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.digest: Optional[str] = None
+        self.empty_warned = False
+
+    async def fetch(self) -> httpx.Response:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return await self.client.get("/machines/", params={"p": 1}, headers=headers)
+
+    async def poll(self) -> List[Dict[str, Any]]:
+        """
+        Fetch only the first listing page and diff it against the stored catalog.
+        Uses conditional headers when the server provides validators and falls back
+        to a body hash, so an unchanged page is never parsed twice.
+        """
+        resp = await self.fetch()
+        if resp.status_code == 304:
+            return []
+        resp.raise_for_status()
+
+        # An expired session still answers 200, just without the member navigation.
+        if b"Logout" not in resp.content:
+            console.print("[bold yellow][!][/bold yellow] Session expired, logging in again...")
+            if not self.auth or not await self.auth.login(self.client):
+                console.print("[bold red][!][/bold red] Re-login failed. Retrying on the next poll.")
+                return []
+            self.etag = self.last_modified = None
+            resp = await self.fetch()
+            resp.raise_for_status()
+
+        digest = hashlib.sha256(resp.content).hexdigest()
+        if digest == self.digest:
+            return []
+
+        machines, _ = self.scraper.parse_machines(resp.content, page=1)
+        if not machines:
+            if not self.empty_warned:
+                console.print("[bold yellow][!][/bold yellow] Listing page parsed to no machines; the site layout may have changed.")
+                self.empty_warned = True
+            return []
+        self.empty_warned = False
+
+        # Only remember validators for pages that parsed, so a bad page is fetched again.
+        self.etag = resp.headers.get("etag")
+        self.last_modified = resp.headers.get("last-modified")
+        self.digest = digest
+
+        if not len(self.catalog):
+            self.catalog.update(machines)
+            self.catalog.save()
+            console.print(f"[bold blue][*][/bold blue] Stored baseline catalog with {len(machines)} machines.")
+            return []
+
+        events = self.catalog.diff(machines)
+        if events:
+            self.catalog.update(machines)
+            self.catalog.save()
+        return events
+
+    async def emit(self, event: Dict[str, Any], hook: Optional[str] = None):
+        """Write an event as a JSON line to stdout, or pipe it to the hook command."""
+        line = json.dumps(event)
+        if not hook:
+            sys.stdout.write(line + "\n")
+            sys.stdout.flush()
+            return
+
+        try:
+            proc = await asyncio.create_subprocess_shell(hook, stdin=asyncio.subprocess.PIPE)
+            await proc.communicate((line + "\n").encode())
+            if proc.returncode:
+                console.print(f"[bold yellow][!][/bold yellow] Hook exited with status {proc.returncode}.")
+        except OSError as e:
+            console.print(f"[bold red][!][/bold red] Failed to run hook: {e}")
+
+    async def watch(self, interval: int = 300, hook: Optional[str] = None, max_interval: Optional[int] = None):
+        """
+        Poll for new or changed machines until interrupted.
+        The delay doubles after every idle poll (capped at max_interval) and
+        resets to the base interval as soon as something changes.
+        """
+        interval = max(interval, 1)
+        max_interval = max(max_interval or interval * 8, interval)
+        delay = interval
+
+        console.print(f"[bold blue][*][/bold blue] Watching for new machines every {interval}s (Ctrl+C to stop)...")
+        try:
+            while True:
+                try:
+                    events = await self.poll()
+                except httpx.HTTPError as e:
+                    console.print(f"[bold red][!][/bold red] Poll failed: {e}")
+                    events = []
+
+                for event in events:
+                    event["ts"] = int(time.time())
+                    await self.emit(event, hook)
+
+                if events:
+                    delay = interval
+                await asyncio.sleep(delay)
+                if not events:
+                    delay = min(delay * 2, max_interval)
+        except asyncio.CancelledError:
+            console.print("[bold yellow][*][/bold yellow] Watch stopped.")
+            raise
@@ -1,8 +1,9 @@
-from selectolax.lexbor import LexborHTMLParser
 import httpx
 from rich.console import Console
 from rich.table import Table
 
+from .details import MachineDetails
+
 console = Console()
 
 class WriteupManager:
@@ -12,56 +13,42 @@ class WriteupManager:
     async def get_writeups(self, vm_name: str):
         """
         Fetch and display community writeups for a specific VM.
-        Parses the table structure containing Date, Author (Poet), Link, and Language.
+        The machine page is fetched and parsed through MachineDetails, so the
+        writeup table shares its cached fetch with the detail fields.
         """
-        url = f"/machines/machine.php?vm={vm_name}"
+        details = MachineDetails(self.client)
         
         try:
             with console.status(f"[bold yellow][*][/bold yellow] Fetching writeup list for {vm_name}..."):
-                resp = await self.client.get(url)
-                
-                if resp.status_code != 200:
-                    console.print(f"[bold red][!][/bold red] Error: Server returned status {resp.status_code}")
+                try:
+                    info = await details.get(vm_name)
+                except httpx.HTTPStatusError as e:
+                    console.print(f"[bold red][!][/bold red] Error: Server returned status {e.response.status_code}")
                     return
+                finally:
+                    details.save()
 
-                if "machine not found" in resp.text.lower():
+                if info is None:
                     console.print(f"[bold red][!][/bold red] Error: Machine '[white]{vm_name}[/white]' not found.")
                     return
 
-                parser = LexborHTMLParser(resp.text)
-
-                writeups = []
-                for row in parser.css("table.table-striped tbody tr"):
-                    date_node = row.css_first("th[scope='row']")
-                    date_val = date_node.text(strip=True) if date_node else "N/A"
-
-                    author_node = row.css_first("a.creator")
-                    author_name = author_node.text(strip=True) if author_node else "Unknown"
-
-                    link_node = row.css_first("a.download")
-                    lang_node = row.css_first("span.size")
-                    
-                    if link_node:
-                        href = str(link_node.attributes.get("href") or "")
-                        format_val = link_node.text(strip=True).replace("!", "")
-                        language = lang_node.text(strip=True) if lang_node else "Unknown"
-                        
-                        writeups.append({
-                            "date": date_val,
-                            "author": author_name,
-                            "language": language,
-                            "format": format_val,
-                            "url": href
-                        })
+                writeups = info["writeups"]
 
                 if not writeups:
                     console.print(f"[bold yellow][!][/bold yellow] No community writeups found for [white]{vm_name}[/white].")
                     return
 
+                facts = [
+                    f"{label}: {info[field]}"
+                    for label, field in [("Released", "released"), ("Rating", "rating"), ("Flags", "flags")]
+                    if info.get(field) is not None
+                ]
+
                 table = Table(
                     title=f"Community Writeups: {vm_name}", 
                     title_style="bold magenta", 
                     header_style="bold cyan",
+                    caption=" | ".join(facts) or None,
                     box=None,
                     padding=(0, 2)
                 )